@@ -0,0 +1,65 @@
+"""
+Numeric kernels for the health LP model.
+Compiled with Numba when it is installed, plain Python otherwise.
+"""
+try:
+    import numba
+except ImportError:  # numba is optional
+    numba = None
+
+
+# Below this many metrics the JIT call overhead outweighs the speed-up
+NUMBA_MIN_METRICS = 1000
+
+# Score of a flagged metric below / at or above the middle of its range
+_FLAGGED_SCORES = (0.3, 0.7)
+# Score of a metric with an empty range, when not flagged / flagged
+_EMPTY_RANGE_SCORES = (1.0, 0.5)
+
+
+def _health_score_py(values, lower, upper, cat_ids, flags, category_weights) -> float:
+    total_score = 0.0
+    total_weight = 0.0
+    
+    for value, lo, hi, cat_id, flagged in zip(values, lower, upper, cat_ids, flags):
+        weight = category_weights[cat_id]
+        if hi > lo:
+            # Normalize value to 0-1 range, clamped
+            normalized = max(0.0, min(1.0, (value - lo) / (hi - lo)))
+            # Convert to score (1.0 = perfect, 0.0 = worst); table lookup
+            # and select instead of a nested if/else on the flag
+            flagged_score = _FLAGGED_SCORES[int(normalized >= 0.5)]
+            score = flagged_score if flagged else normalized
+        else:
+            score = _EMPTY_RANGE_SCORES[int(flagged)]
+        
+        total_score += score * weight
+        total_weight += weight
+    
+    if total_weight == 0:
+        return 100.0
+    
+    return (total_score / total_weight) * 100.0
+
+
+# Compiled lazily on first call; results match the Python version (no fastmath)
+_health_score_jit = numba.njit(cache=True)(_health_score_py) if numba else None
+
+
+def weighted_health_score(values, lower, upper, cat_ids, flags, category_weights) -> float:
+    """
+    Weighted health score (0-100) over parallel metric columns.
+    
+    Each metric scores its value normalized to [0, 1] within its range;
+    flagged metrics score 0.3 below the midpoint and 0.7 above it.
+    Each metric is weighted by category_weights[cat_id].
+    """
+    global _health_score_jit
+    if _health_score_jit is not None and len(values) >= NUMBA_MIN_METRICS:
+        try:
+            return _health_score_jit(values, lower, upper, cat_ids, flags, category_weights)
+        except numba.core.errors.NumbaError:
+            # Numba could not compile for these column types; use the
+            # Python loop from now on instead of failing the report
+            _health_score_jit = None
+    return _health_score_py(values, lower, upper, cat_ids, flags, category_weights)
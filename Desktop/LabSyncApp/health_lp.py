@@ -2,20 +2,54 @@
 Linear Programming model for health metrics optimization and flagging.
 Includes sleep debt calculation and evaluation.
 """
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Sequence, Tuple, Optional
+from dataclasses import dataclass, field
+from itertools import compress
+from operator import gt, lt, or_
 from datetime import datetime, timedelta
+from _kernels import weighted_health_score
 
 
-@dataclass
+# Integer ids for the known categories; everything else shares the last id
+_CATEGORY_IDS = {
+    "Sleep": 0,
+    "Cardiovascular": 1,
+    "Activity": 2
+}
+_OTHER_CATEGORY_ID = 3
+
+# Weights for different categories, indexed by category id
+_CATEGORY_WEIGHTS = (0.3, 0.3, 0.4, 0.1)
+
+# Sleep debt results kept per model (least recently used evicted first)
+_SLEEP_DEBT_CACHE_SIZE = 128
+
+
+def _out_of_range(values, lower, upper) -> List[bool]:
+    """HealthMetric.check_flag()'s rule per element, compared in C."""
+    return list(map(or_, map(lt, values, lower), map(gt, values, upper)))
+
+
+@dataclass(slots=True)
 class HealthMetric:
-    """Represents a health metric with its value and thresholds."""
+    """
+    Represents a health metric with its value and thresholds.
+    
+    is_flagged is derived from the value and thresholds when the metric
+    is created; call check_flag() again after changing them.
+    """
     name: str
     value: float
     lower_threshold: float
     upper_threshold: float
     category: str
-    is_flagged: bool = False
+    is_flagged: bool = field(default=False, init=False)
+    
+    def __post_init__(self):
+        self.check_flag()
     
     def check_flag(self) -> bool:
         """Check if metric is outside acceptable range."""
@@ -26,7 +60,7 @@ class HealthMetric:
         return self.is_flagged
 
 
-@dataclass
+@dataclass(slots=True)
 class SleepData:
     """Sleep data for a given day."""
     date: datetime
@@ -35,10 +69,63 @@ class SleepData:
     sleep_efficiency: float  # 0-100
 
 
+class _MetricTable:
+    """
+    Column-wise copy of HealthLP.metrics for the bulk numeric passes.
+    
+    Row i mirrors metrics[i]. Values and thresholds are kept as float64:
+    float32 rounding can move a value across a threshold (0.99000001 vs
+    0.99 compare equal in float32), so column flags would disagree with
+    HealthMetric.check_flag().
+    """
+    __slots__ = ("values", "lower", "upper", "cat_ids", "flags")
+    
+    def __init__(self):
+        self.values = array("d")
+        self.lower = array("d")
+        self.upper = array("d")
+        self.cat_ids = array("B")
+        self.flags = array("b")
+    
+    def append(self, metric: HealthMetric):
+        """Add a row for metric."""
+        self.values.append(metric.value)
+        self.lower.append(metric.lower_threshold)
+        self.upper.append(metric.upper_threshold)
+        self.cat_ids.append(_CATEGORY_IDS.get(metric.category, _OTHER_CATEGORY_ID))
+        self.flags.append(metric.is_flagged)
+    
+    def extend(self, metrics: Sequence[HealthMetric]):
+        """Add a row for each of metrics."""
+        self.values.extend(m.value for m in metrics)
+        self.lower.extend(m.lower_threshold for m in metrics)
+        self.upper.extend(m.upper_threshold for m in metrics)
+        self.cat_ids.extend(
+            _CATEGORY_IDS.get(m.category, _OTHER_CATEGORY_ID) for m in metrics
+        )
+        self.flags.extend(m.is_flagged for m in metrics)
+    
+    def set(self, idx: int, metric: HealthMetric):
+        """Overwrite row idx with metric."""
+        self.values[idx] = metric.value
+        self.lower[idx] = metric.lower_threshold
+        self.upper[idx] = metric.upper_threshold
+        self.cat_ids[idx] = _CATEGORY_IDS.get(metric.category, _OTHER_CATEGORY_ID)
+        self.flags[idx] = metric.is_flagged
+    
+    def columns(self) -> Tuple[array, ...]:
+        """Return (values, lower, upper, category ids, flags)."""
+        return self.values, self.lower, self.upper, self.cat_ids, self.flags
+
+
 class HealthLP:
     """
     Linear Programming model for health metrics evaluation.
     Handles flagging logic and sleep debt calculation.
+    
+    Results derived from metrics and sleep_history are cached. Replacing
+    or resizing either list is picked up automatically; after changing
+    an entry in place (or assigning metrics[i]), call refresh().
     """
     
     def __init__(self, target_sleep_hours: float = 8.0):
@@ -50,7 +137,92 @@ class HealthLP:
         """
         self.target_sleep_hours = target_sleep_hours
         self.metrics: List[HealthMetric] = []
+        # The list the derived metric state below was built from
+        self._synced_metrics: List[HealthMetric] = self.metrics
+        # Position of the first metric with each name in self.metrics
+        self._metric_index: Dict[str, int] = {}
         self.sleep_history: List[SleepData] = []
+        # The list the sleep columns below were built from
+        self._synced_sleep: List[SleepData] = self.sleep_history
+        # Sorted parallel columns of sleep_history for range queries.
+        # Durations stay float64, like the metric columns. Dates stay
+        # datetime objects: a period costs only two bisects, and converting
+        # the query bounds to integer keys costs more than it saves.
+        self._sleep_dates: List[datetime] = []
+        self._sleep_durations = array("d")
+        # Bumped whenever sleep data changes; part of the sleep debt cache
+        # key, so results for older data are never returned (and age out)
+        self._sleep_version = 0
+        self._sleep_debt_cache: "OrderedDict[Tuple, float]" = OrderedDict()
+        # Column-wise copy of self.metrics, updated as metrics are added
+        self._table = _MetricTable()
+        # Number of flagged metrics, kept in step with the flag column
+        self._flagged_count = 0
+        # Result of the last _build_summary(); None when metrics have changed
+        self._summary: Optional[Tuple] = None
+    
+    def _metrics_changed(self):
+        """Drop results computed from the old metrics."""
+        self._summary = None
+    
+    def _sync_metrics(self):
+        """Rebuild derived state if self.metrics was replaced or resized."""
+        if (self.metrics is not self._synced_metrics
+                or len(self.metrics) != len(self._table.values)):
+            self._rebuild_metrics()
+    
+    def _sync_sleep(self):
+        """Rebuild the sleep columns if sleep_history was replaced or resized."""
+        if (self.sleep_history is not self._synced_sleep
+                or len(self.sleep_history) != len(self._sleep_dates)):
+            self._rebuild_sleep()
+    
+    def refresh(self):
+        """
+        Rebuild cached state from self.metrics and self.sleep_history.
+        
+        Call after changing either without going through HealthLP, e.g.
+        metric.value = x; flags are re-evaluated, so check_flag() is not
+        needed first.
+        """
+        self._rebuild_metrics()
+        self._rebuild_sleep()
+    
+    def _rebuild_metrics(self):
+        """Recreate the metric index and columns from self.metrics."""
+        metrics = self.metrics
+        self._synced_metrics = metrics
+        self._metric_index = {}
+        for idx, metric in enumerate(metrics):
+            self._metric_index.setdefault(metric.name, idx)
+        self._table = _MetricTable()
+        self._table.extend(metrics)
+        self._recompute_flags()
+    
+    def _recompute_flags(self):
+        """
+        Re-evaluate is_flagged for every metric from the metric columns.
+        
+        Equivalent to calling check_flag() on each metric, but the
+        comparisons run over the columns in C; only the write-back to the
+        dataclasses is a Python loop.
+        """
+        table = self._table
+        flags = _out_of_range(table.values, table.lower, table.upper)
+        for metric, flagged in zip(self.metrics, flags):
+            metric.is_flagged = flagged
+        table.flags = array("b", flags)
+        self._flagged_count = flags.count(True)
+        self._metrics_changed()
+    
+    def _rebuild_sleep(self):
+        """Sort sleep_history by date and recreate its columns."""
+        history = self.sleep_history
+        history.sort(key=lambda x: x.date)
+        self._synced_sleep = history
+        self._sleep_dates = [s.date for s in history]
+        self._sleep_durations = array("d", [s.sleep_duration_hours for s in history])
+        self._sleep_data_changed()
         
     def add_metric(
         self, 
@@ -68,8 +240,63 @@ class HealthLP:
             upper_threshold=upper_threshold,
             category=category
         )
-        metric.check_flag()
+        self._sync_metrics()
+        self._metric_index.setdefault(name, len(self.metrics))
         self.metrics.append(metric)
+        self._table.append(metric)
+        self._flagged_count += metric.is_flagged
+        self._metrics_changed()
+        return metric
+    
+    def add_metrics(
+        self,
+        rows: Sequence[Tuple[str, float, float, float, str]]
+    ) -> List[HealthMetric]:
+        """
+        Add several health metrics at once.
+        
+        Args:
+            rows: (name, value, lower_threshold, upper_threshold, category) tuples
+            
+        Returns:
+            The added metrics, in order
+        """
+        added = [
+            HealthMetric(
+                name=name,
+                value=value,
+                lower_threshold=lower,
+                upper_threshold=upper,
+                category=category
+            )
+            for name, value, lower, upper, category in rows
+        ]
+        
+        self._sync_metrics()
+        start = len(self.metrics)
+        for offset, metric in enumerate(added):
+            self._metric_index.setdefault(metric.name, start + offset)
+        self.metrics.extend(added)
+        self._table.extend(added)
+        self._flagged_count += sum(m.is_flagged for m in added)
+        self._metrics_changed()
+        return added
+    
+    def add_or_update_metric(self, metric: HealthMetric) -> HealthMetric:
+        """Replace the metric with the same name, or add it if not present."""
+        metric.check_flag()
+        self._sync_metrics()
+        existing_idx = self._metric_index.get(metric.name)
+        if existing_idx is not None:
+            self._flagged_count -= self._table.flags[existing_idx]
+            self.metrics[existing_idx] = metric
+            self._table.set(existing_idx, metric)
+        else:
+            self._metric_index[metric.name] = len(self.metrics)
+            self.metrics.append(metric)
+            self._table.append(metric)
+        self._flagged_count += metric.is_flagged
+        self._metrics_changed()
         return metric
     
     def add_sleep_data(
@@ -86,9 +313,17 @@ class HealthLP:
             sleep_quality_score=sleep_quality_score,
             sleep_efficiency=sleep_efficiency
         )
-        self.sleep_history.append(sleep_data)
-        # Sort by date
-        self.sleep_history.sort(key=lambda x: x.date)
+        self._sync_sleep()
+        # Keep history sorted by date (after any equal dates, like a stable sort)
+        idx = bisect_right(self._sleep_dates, date)
+        self.sleep_history.insert(idx, sleep_data)
+        self._sleep_dates.insert(idx, date)
+        self._sleep_durations.insert(idx, sleep_duration_hours)
+        self._sleep_data_changed()
+    
+    def _sleep_data_changed(self):
+        """Invalidate everything derived from older sleep data."""
+        self._sleep_version += 1
     
     def calculate_sleep_debt(
         self, 
@@ -108,20 +343,36 @@ class HealthLP:
         Returns:
             Total sleep debt in hours
         """
-        total_debt = 0.0
-        
-        # Filter sleep data for the period
-        period_sleep = [
-            s for s in self.sleep_history 
-            if start_date <= s.date <= end_date
-        ]
-        
-        for sleep_data in period_sleep:
-            deficit = self.target_sleep_hours - sleep_data.sleep_duration_hours
-            if deficit > 0:
-                total_debt += deficit
-        
-        return total_debt
+        self._sync_sleep()
+        target = self.target_sleep_hours
+        key = (start_date, end_date, target, self._sleep_version)
+        cache = self._sleep_debt_cache
+        debt = cache.get(key)
+        if debt is None:
+            debt = self._compute_sleep_debt(start_date, end_date, target)
+            cache[key] = debt
+            if len(cache) > _SLEEP_DEBT_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return debt
+    
+    def _compute_sleep_debt(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        target: float
+    ) -> float:
+        """Uncached calculate_sleep_debt()."""
+        # Dates are sorted, so the period is a contiguous slice found with
+        # two binary searches instead of comparing every date
+        lo = bisect_left(self._sleep_dates, start_date)
+        hi = bisect_right(self._sleep_dates, end_date, lo)
+        return sum(
+            (target - hours for hours in self._sleep_durations[lo:hi]
+             if hours < target),
+            0.0
+        )
     
     def get_sleep_debt_metric(
         self, 
@@ -151,9 +402,56 @@ class HealthLP:
             upper_threshold=max_acceptable_debt,
             category="Sleep"
         )
-        metric.check_flag()
         return metric
     
+    def summarize(self) -> Dict:
+        """
+        Evaluate all metrics in a single pass.
+        
+        The result is cached until the metrics change (see refresh()).
+        Each call returns new lists, so callers may change them.
+        
+        Returns:
+            Dictionary with flagged_by_category, total_flagged and health_score
+        """
+        flagged_by_category, total_flagged, health_score = self._cached_summary()
+        return {
+            "flagged_by_category": {
+                category: list(flagged)
+                for category, flagged in flagged_by_category.items()
+            },
+            "total_flagged": total_flagged,
+            "health_score": health_score
+        }
+    
+    def _cached_summary(self) -> Tuple[Dict[str, Tuple[HealthMetric, ...]], int, float]:
+        """(flagged_by_category, total_flagged, health_score), built once per change."""
+        self._sync_metrics()
+        if self._summary is None:
+            self._summary = self._build_summary()
+        return self._summary
+    
+    def _build_summary(self) -> Tuple[Dict[str, Tuple[HealthMetric, ...]], int, float]:
+        """Uncached summarize(), with the flagged metrics as tuples."""
+        flagged_by_category: Dict[str, List[HealthMetric]] = defaultdict(list)
+        
+        metrics = self.metrics
+        # Visit only the flagged rows, in order, skipping the rest in C
+        for idx in compress(range(len(metrics)), self._table.flags):
+            metric = metrics[idx]
+            flagged_by_category[metric.category].append(metric)
+        
+        health_score = weighted_health_score(
+            *self._table.columns(), _CATEGORY_WEIGHTS
+        )
+        
+        return (
+            {category: tuple(flagged)
+             for category, flagged in flagged_by_category.items()},
+            self._flagged_count,
+            health_score
+        )
+    
     def evaluate_all_metrics(self) -> Dict[str, List[HealthMetric]]:
         """
         Evaluate all metrics and return flagged metrics by category.
@@ -161,19 +459,13 @@ class HealthLP:
         Returns:
             Dictionary mapping category names to lists of flagged metrics
         """
-        flagged_by_category: Dict[str, List[HealthMetric]] = {}
-        
-        for metric in self.metrics:
-            if metric.is_flagged:
-                if metric.category not in flagged_by_category:
-                    flagged_by_category[metric.category] = []
-                flagged_by_category[metric.category].append(metric)
-        
-        return flagged_by_category
+        return self.summarize()["flagged_by_category"]
     
     def get_total_flagged_count(self) -> int:
         """Return total number of flagged metrics."""
-        return sum(1 for m in self.metrics if m.is_flagged)
+        # Maintained on every change, so no summary needs to be built
+        self._sync_metrics()
+        return self._flagged_count
     
     def optimize_health_score(self) -> float:
         """
@@ -183,47 +475,10 @@ class HealthLP:
         Returns:
             Health score from 0-100 (higher is better)
         """
-        if not self.metrics:
-            return 100.0
-        
-        total_score = 0.0
-        total_weight = 0.0
-        
-        # Weights for different categories
-        category_weights = {
-            "Sleep": 0.3,
-            "Cardiovascular": 0.3,
-            "Activity": 0.4
-        }
-        
-        for metric in self.metrics:
-            weight = category_weights.get(metric.category, 0.1)
-            
-            # Calculate normalized score (0-1) for this metric
-            if metric.upper_threshold > metric.lower_threshold:
-                # Normalize value to 0-1 range
-                normalized = (metric.value - metric.lower_threshold) / (
-                    metric.upper_threshold - metric.lower_threshold
-                )
-                # Clamp to [0, 1]
-                normalized = max(0.0, min(1.0, normalized))
-                # Convert to score (1.0 = perfect, 0.0 = worst)
-                if metric.is_flagged:
-                    score = 0.3 if normalized < 0.5 else 0.7
-                else:
-                    score = normalized
-            else:
-                score = 1.0 if not metric.is_flagged else 0.5
-            
-            total_score += score * weight
-            total_weight += weight
-        
-        if total_weight == 0:
-            return 100.0
-        
-        return (total_score / total_weight) * 100.0
+        return self._cached_summary()[2]
     
     def reset(self):
         """Reset all metrics and sleep history."""
         self.metrics = []
         self.sleep_history = []
+        self.refresh()
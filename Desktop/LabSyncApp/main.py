@@ -33,16 +33,18 @@ def main():
         )
     
     # Add other health metrics
-    lp.add_metric("Resting Heart Rate", 72, 60, 100, "Cardiovascular")
-    lp.add_metric("Max Heart Rate", 185, 150, 200, "Cardiovascular")
-    lp.add_metric("Steps", 8500, 10000, 20000, "Activity")
-    lp.add_metric("Active Minutes", 25, 30, 120, "Activity")
-    lp.add_metric("Calories Burned", 2100, 2000, 3000, "Activity")
-    lp.add_metric("Sleep Duration", 6.8, 7.0, 9.0, "Sleep")
-    lp.add_metric("Sleep Quality", 65, 70, 100, "Sleep")
-    lp.add_metric("Distance", 5.2, 6.0, 15.0, "Activity")
-    lp.add_metric("VO2 Max", 42, 40, 60, "Cardiovascular")
-    lp.add_metric("Exercise Duration", 20, 30, 90, "Activity")
+    lp.add_metrics([
+        ("Resting Heart Rate", 72, 60, 100, "Cardiovascular"),
+        ("Max Heart Rate", 185, 150, 200, "Cardiovascular"),
+        ("Steps", 8500, 10000, 20000, "Activity"),
+        ("Active Minutes", 25, 30, 120, "Activity"),
+        ("Calories Burned", 2100, 2000, 3000, "Activity"),
+        ("Sleep Duration", 6.8, 7.0, 9.0, "Sleep"),
+        ("Sleep Quality", 65, 70, 100, "Sleep"),
+        ("Distance", 5.2, 6.0, 15.0, "Activity"),
+        ("VO2 Max", 42, 40, 60, "Cardiovascular"),
+        ("Exercise Duration", 20, 30, 90, "Activity"),
+    ])
     
     # Generate report
     generator = ReportGenerator(lp)
@@ -2,11 +2,154 @@
 Wearable Health Summary Report Generator.
 Generates reports with flagged metrics including sleep debt.
 """
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from health_lp import HealthLP, HealthMetric
 
 
+_REPORT_DATE_FORMAT = "%d/%m/%Y"
+_PERIOD_DATE_FORMAT = "%b %d, %Y"
+
+
+# Rendered reports kept per format (least recently used evicted first)
+_REPORT_CACHE_SIZE = 32
+
+
+def _date_key(value: datetime) -> Tuple:
+    """
+    Cache key for a rendered date.
+    
+    Aware datetimes for the same instant in different time zones compare
+    equal but print differently, so the tzinfo is part of the key. Plain
+    dates have no tzinfo.
+    """
+    return value, getattr(value, "tzinfo", None)
+
+
+def _report_key(report: Dict, with_metrics: bool) -> Tuple:
+    """
+    Hashable key covering everything a formatter renders.
+    
+    Args:
+        report: Report dictionary from generate_report()
+        with_metrics: Include each flagged metric (the text report lists
+            them); otherwise only the per-category counts (HTML)
+    
+    The health score is used unrounded: rounding it for the key could
+    merge two reports that still format to different scores.
+    """
+    period = report['period']
+    ref = report.get('reference_period')
+    sleep_debt = report.get('sleep_debt')
+    flagged_by_category = report['flagged_by_category']
+    if with_metrics:
+        flagged = tuple(
+            (category, tuple(
+                (m.name, m.value, m.lower_threshold, m.upper_threshold)
+                for m in metrics
+            ))
+            for category, metrics in flagged_by_category.items()
+        )
+    else:
+        flagged = tuple(
+            (category, len(metrics))
+            for category, metrics in flagged_by_category.items()
+        )
+    return (
+        report['patient_email'],
+        _date_key(report['report_date']),
+        (_date_key(period['start']), _date_key(period['end']), period['days']),
+        (
+            (_date_key(ref['start']), _date_key(ref['end']), ref['days'])
+            if ref else None
+        ),
+        report['total_flagged'],
+        flagged,
+        (
+            (sleep_debt['value'], sleep_debt['is_flagged'], sleep_debt['target'])
+            if sleep_debt else None
+        ),
+        report['health_score'],
+    )
+
+
+# Static <head> of the HTML report, up to and including <body>
+_HTML_HEAD = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Wearable Health Summary Report</title>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            max-width: 800px;
+            margin: 40px auto;
+            padding: 20px;
+            background-color: #ffffff;
+        }
+        h1 {
+            font-size: 28px;
+            font-weight: bold;
+            margin-bottom: 30px;
+        }
+        .info-section {
+            display: flex;
+            justify-content: space-between;
+            margin-bottom: 30px;
+        }
+        .info-column {
+            flex: 1;
+        }
+        .info-item {
+            margin-bottom: 10px;
+        }
+        .flagged-section {
+            margin-top: 30px;
+        }
+        .flagged-count {
+            font-size: 32px;
+            font-weight: bold;
+            margin: 20px 0;
+        }
+        .category-group {
+            margin: 15px 0;
+            font-size: 16px;
+        }
+        .category-emoji {
+            font-size: 20px;
+            margin-right: 8px;
+        }
+        hr {
+            border: none;
+            border-top: 1px solid #ddd;
+            margin: 20px 0;
+        }
+        .sleep-debt {
+            margin-top: 20px;
+            padding: 15px;
+            background-color: #f5f5f5;
+            border-radius: 5px;
+        }
+        .health-score {
+            margin-top: 20px;
+            font-size: 18px;
+            font-weight: bold;
+        }
+    </style>
+</head>
+<body>
+"""
+
+# One line of the flagged metrics breakdown in the HTML report
+_CATEGORY_GROUP_HTML = """
+        <div class="category-group">
+            <span class="category-emoji">{emoji}</span>
+            <span>{count} {category}</span>
+        </div>
+"""
+
+
 class ReportGenerator:
     """Generates wearable health summary reports."""
     
@@ -25,6 +168,8 @@ class ReportGenerator:
             lp_model: HealthLP model instance
         """
         self.lp_model = lp_model
+        self._text_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._html_cache: "OrderedDict[Tuple, str]" = OrderedDict()
     
     def generate_report(
         self,
@@ -58,21 +203,11 @@ class ReportGenerator:
             period_end
         )
         
-        # Check if sleep debt is already in metrics (update or add)
-        existing_sleep_debt_idx = next(
-            (i for i, m in enumerate(self.lp_model.metrics) if m.name == "Sleep Debt"),
-            None
-        )
-        if existing_sleep_debt_idx is not None:
-            # Update existing sleep debt metric
-            self.lp_model.metrics[existing_sleep_debt_idx] = sleep_debt_metric
-        else:
-            # Add new sleep debt metric
-            self.lp_model.metrics.append(sleep_debt_metric)
+        # Update the existing sleep debt metric, or add it on first report
+        self.lp_model.add_or_update_metric(sleep_debt_metric)
         
-        # Get flagged metrics by category
-        flagged_by_category = self.lp_model.evaluate_all_metrics()
-        total_flagged = self.lp_model.get_total_flagged_count()
+        # Flagged metrics by category, flagged count and score in one pass
+        summary = self.lp_model.summarize()
         
         # Calculate reference period info if provided
         reference_info = None
@@ -94,9 +229,9 @@ class ReportGenerator:
                 "days": period_days
             },
             "reference_period": reference_info,
-            "total_flagged": total_flagged,
-            "flagged_by_category": flagged_by_category,
-            "health_score": self.lp_model.optimize_health_score(),
+            "total_flagged": summary["total_flagged"],
+            "flagged_by_category": summary["flagged_by_category"],
+            "health_score": summary["health_score"],
             "sleep_debt": {
                 "value": sleep_debt_metric.value,
                 "is_flagged": sleep_debt_metric.is_flagged,
@@ -116,6 +251,49 @@ class ReportGenerator:
         Returns:
             Formatted text report
         """
+        key = _report_key(report, with_metrics=True)
+        return self._render_cached(self._text_cache, key, report, self._render_text)
+    
+    def format_report_html(self, report: Dict) -> str:
+        """
+        Format report as HTML (similar to the image shown).
+        
+        Args:
+            report: Report dictionary from generate_report()
+            
+        Returns:
+            HTML formatted report
+        """
+        key = _report_key(report, with_metrics=False)
+        return self._render_cached(self._html_cache, key, report, self._render_html)
+    
+    @staticmethod
+    def _render_cached(
+        cache: "OrderedDict[Tuple, str]",
+        key: Tuple,
+        report: Dict,
+        render: Callable[[Dict], str]
+    ) -> str:
+        """Return render(report), reusing the result cached under key."""
+        rendered = cache.get(key)
+        if rendered is not None:
+            cache.move_to_end(key)
+            return rendered
+        
+        rendered = render(report)
+        cache[key] = rendered
+        if len(cache) > _REPORT_CACHE_SIZE:
+            cache.popitem(last=False)
+        return rendered
+    
+    def _render_text(self, report: Dict) -> str:
+        """Uncached format_report_text()."""
+        period = report['period']
+        ref = report.get('reference_period')
+        report_date = report['report_date'].strftime(_REPORT_DATE_FORMAT)
+        period_start = period['start'].strftime(_PERIOD_DATE_FORMAT)
+        period_end = period['end'].strftime(_PERIOD_DATE_FORMAT)
+        
         lines = []
         lines.append("=" * 60)
         lines.append("WEARABLE HEALTH SUMMARY REPORT")
@@ -124,25 +302,25 @@ class ReportGenerator:
         
         # Patient and date info
         lines.append(f"Patient email: {report['patient_email']}")
-        lines.append(f"Report date: {report['report_date'].strftime('%d/%m/%Y')}")
+        lines.append(f"Report date: {report_date}")
         lines.append("")
         
         # Period info
-        period = report['period']
         lines.append(
             f"{period['days']} Days values: "
-            f"{period['start'].strftime('%b %d, %Y')} - "
-            f"{period['end'].strftime('%b %d, %Y')} "
+            f"{period_start} - "
+            f"{period_end} "
             f"({period['days']} days)"
         )
         
         # Reference period info
-        if report.get('reference_period'):
-            ref = report['reference_period']
+        if ref:
+            ref_start = ref['start'].strftime(_PERIOD_DATE_FORMAT)
+            ref_end = ref['end'].strftime(_PERIOD_DATE_FORMAT)
             lines.append(
                 f"30 Days Reference Range: "
-                f"{ref['start'].strftime('%b %d, %Y')} - "
-                f"{ref['end'].strftime('%b %d, %Y')} "
+                f"{ref_start} - "
+                f"{ref_end} "
                 f"({ref['days']} days)"
             )
         
@@ -190,129 +368,41 @@ class ReportGenerator:
         
         return "\n".join(lines)
     
-    def format_report_html(self, report: Dict) -> str:
-        """
-        Format report as HTML (similar to the image shown).
-        
-        Args:
-            report: Report dictionary from generate_report()
-            
-        Returns:
-            HTML formatted report
-        """
+    def _render_html(self, report: Dict) -> str:
+        """Uncached format_report_html()."""
         period = report['period']
         ref = report.get('reference_period')
+        report_date = report['report_date'].strftime(_REPORT_DATE_FORMAT)
+        period_start = period['start'].strftime(_PERIOD_DATE_FORMAT)
+        period_end = period['end'].strftime(_PERIOD_DATE_FORMAT)
         
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Wearable Health Summary Report</title>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            max-width: 800px;
-            margin: 40px auto;
-            padding: 20px;
-            background-color: #ffffff;
-        }}
-        h1 {{
-            font-size: 28px;
-            font-weight: bold;
-            margin-bottom: 30px;
-        }}
-        .info-section {{
-            display: flex;
-            justify-content: space-between;
-            margin-bottom: 30px;
-        }}
-        .info-column {{
-            flex: 1;
-        }}
-        .info-item {{
-            margin-bottom: 10px;
-        }}
-        .flagged-section {{
-            margin-top: 30px;
-        }}
-        .flagged-count {{
-            font-size: 32px;
-            font-weight: bold;
-            margin: 20px 0;
-        }}
-        .category-group {{
-            margin: 15px 0;
-            font-size: 16px;
-        }}
-        .category-emoji {{
-            font-size: 20px;
-            margin-right: 8px;
-        }}
-        hr {{
-            border: none;
-            border-top: 1px solid #ddd;
-            margin: 20px 0;
-        }}
-        .sleep-debt {{
-            margin-top: 20px;
-            padding: 15px;
-            background-color: #f5f5f5;
-            border-radius: 5px;
-        }}
-        .health-score {{
-            margin-top: 20px;
-            font-size: 18px;
-            font-weight: bold;
-        }}
-    </style>
-</head>
-<body>
-    <h1>Wearable Health Summary Report</h1>
-    
-    <div class="info-section">
-        <div class="info-column">
-            <div class="info-item">Patient email: {report['patient_email']}</div>
-            <div class="info-item">
-                {period['days']} Days values: {period['start'].strftime('%b %d, %Y')} - {period['end'].strftime('%b %d, %Y')} ({period['days']} days)
-            </div>
-        </div>
-        <div class="info-column">
-            <div class="info-item">Report date: {report['report_date'].strftime('%d/%m/%Y')}</div>
-"""
-        
+        # Variable-length sections, rendered separately; empty when absent
+        reference_html = ""
         if ref:
-            html += f"""
+            ref_start = ref['start'].strftime(_PERIOD_DATE_FORMAT)
+            ref_end = ref['end'].strftime(_PERIOD_DATE_FORMAT)
+            reference_html = f"""
             <div class="info-item">
-                30 Days Reference Range: {ref['start'].strftime('%b %d, %Y')} - {ref['end'].strftime('%b %d, %Y')} ({ref['days']} days)
+                30 Days Reference Range: {ref_start} - {ref_end} ({ref['days']} days)
             </div>
 """
         
-        html += """
-        </div>
-    </div>
-    
-    <div class="flagged-section">
-        <h2>Flagged Metrics</h2>
-        <div class="flagged-count">{}</div>
-""".format(report['total_flagged'])
-        
         # Category breakdown
-        flagged_by_category = report['flagged_by_category']
-        for category, metrics in flagged_by_category.items():
-            emoji = self.CATEGORY_EMOJIS.get(category, "📊")
-            count = len(metrics)
-            html += f"""
-        <div class="category-group">
-            <span class="category-emoji">{emoji}</span>
-            <span>{count} {category}</span>
-        </div>
-"""
+        categories_html = "".join([
+            _CATEGORY_GROUP_HTML.format(
+                emoji=self.CATEGORY_EMOJIS.get(category, "📊"),
+                count=len(metrics),
+                category=category
+            )
+            for category, metrics in report['flagged_by_category'].items()
+        ])
         
         # Sleep debt section
+        sleep_debt_html = ""
         sleep_debt = report.get('sleep_debt', {})
         if sleep_debt:
             status_emoji = "⚠️" if sleep_debt['is_flagged'] else "✅"
-            html += f"""
+            sleep_debt_html = f"""
         <hr>
         <div class="sleep-debt">
             <h3>Sleep Debt</h3>
@@ -322,7 +412,26 @@ class ReportGenerator:
         </div>
 """
         
-        html += f"""
+        # Fixed skeleton of the body in a single f-string
+        return _HTML_HEAD + f"""    <h1>Wearable Health Summary Report</h1>
+    
+    <div class="info-section">
+        <div class="info-column">
+            <div class="info-item">Patient email: {report['patient_email']}</div>
+            <div class="info-item">
+                {period['days']} Days values: {period_start} - {period_end} ({period['days']} days)
+            </div>
+        </div>
+        <div class="info-column">
+            <div class="info-item">Report date: {report_date}</div>
+{reference_html}
+        </div>
+    </div>
+    
+    <div class="flagged-section">
+        <h2>Flagged Metrics</h2>
+        <div class="flagged-count">{report['total_flagged']}</div>
+{categories_html}{sleep_debt_html}
         <hr>
         <div class="health-score">
             Overall Health Score: {report['health_score']:.1f}/100
@@ -331,5 +440,3 @@ class ReportGenerator:
 </body>
 </html>
 """
-        
-        return html